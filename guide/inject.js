@@ -182,7 +182,9 @@
         };
 
         ws.onmessage = async (e) => {
-            const data = JSON.parse(e.data);
+            // 服务端以二进制帧发送预编码 JSON，兼容文本帧
+            const text = typeof e.data === 'string' ? e.data : await e.data.text();
+            const data = JSON.parse(text);
 
             if (data.type === 'register_success') {
                 clientId = data.client_id;
@@ -227,12 +229,13 @@
         const url = origCreateObjectURL(blob);
         if (blob && (blob.type?.startsWith('image/') || blob.type?.startsWith('video/') || blob.size > 100000)) {
             console.log('📥 拦截Blob:', blob.type, Math.round(blob.size / 1024) + 'KB');
+            // 直接读取原始字节，后续用二进制帧发送，全程不经过 base64
             const reader = new FileReader();
             reader.onloadend = () => {
-                capturedImageData = reader.result.split(',')[1];
+                capturedImageData = reader.result;
                 if (onImageCaptured) onImageCaptured(capturedImageData);
             };
-            reader.readAsDataURL(blob);
+            reader.readAsArrayBuffer(blob);
         }
         return url;
     };
@@ -417,6 +420,20 @@
         sendWsMessage({type: 'result', task_id: taskId, error});
     }
 
+    // 二进制分块帧：40 字节头（task_id 32 字节 NUL 填充 + chunk_index + total_chunks，小端）+ 原始字节
+    function sendBinaryChunk(taskId, chunkIndex, totalChunks, bytes) {
+        if (ws?.readyState !== WebSocket.OPEN) return false;
+        const frame = new Uint8Array(40 + bytes.byteLength);
+        const idBytes = new TextEncoder().encode(taskId);
+        frame.set(idBytes.subarray(0, 32), 0);
+        const view = new DataView(frame.buffer);
+        view.setUint32(32, chunkIndex, true);
+        view.setUint32(36, totalChunks, true);
+        frame.set(new Uint8Array(bytes), 40);
+        ws.send(frame);
+        return true;
+    }
+
     async function executeTask(taskId, prompt, taskType, aspectRatio, resolution, referenceImages) {
         console.log('🚀 执行任务:', taskId, taskType, prompt.substring(0, 30) + '...');
 
@@ -501,19 +518,11 @@
                 "4K": "Download 4K", "2K": "Download 2K", "1K": "Download 1K"
             };
 
-            let base64Data = null;
+            let imageBuffer = null;
             if (resolution.toUpperCase() === '1K') {
                 const img1k = $x1('//div[@data-item-index][contains(., "Reuse prompt")]/div/div/div/div/div[1]//img');
                 const response = await fetch(img1k.src);
-                const blob = await response.blob();
-
-                base64Data = await new Promise((resolve) => {
-                    const reader = new FileReader();
-                    reader.onloadend = () => {
-                        resolve(reader.result.split(',')[1]);
-                    };
-                    reader.readAsDataURL(blob);
-                });
+                imageBuffer = await response.arrayBuffer();
             } else {
                 const resolutionText = resMap[resolution];
                 if (!resolutionText) throw new Error('未知分辨率: ' + resolution);
@@ -523,28 +532,19 @@
 
                 // 等待图片数据
                 sendStatus('获取数据...');
-                base64Data = await waitForImageData(4 * 60 * 1000);
+                imageBuffer = await waitForImageData(4 * 60 * 1000);
             }
 
 
-            if (base64Data) {
+            if (imageBuffer) {
                 sendStatus('发送数据...');
                 const chunkSize = 1024 * 1024;
-                const totalChunks = Math.ceil(base64Data.length / chunkSize);
-
-                if (totalChunks > 1) {
-                    for (let i = 0; i < totalChunks; i++) {
-                        sendWsMessage({
-                            type: 'image_chunk',
-                            task_id: taskId,
-                            chunk_index: i,
-                            total_chunks: totalChunks,
-                            data: base64Data.slice(i * chunkSize, (i + 1) * chunkSize)
-                        });
-                        await sleep(100);
-                    }
-                } else {
-                    sendWsMessage({type: 'image_data', task_id: taskId, data: base64Data});
+                const totalChunks = Math.max(1, Math.ceil(imageBuffer.byteLength / chunkSize));
+
+                for (let i = 0; i < totalChunks; i++) {
+                    sendBinaryChunk(taskId, i, totalChunks,
+                        imageBuffer.slice(i * chunkSize, (i + 1) * chunkSize));
+                    await sleep(100);
                 }
                 sendStatus('完成 ✅');
             } else {
@@ -5,19 +5,30 @@ Veo3Free - AI生成工具 PyWebview + React 版本
 """
 
 import asyncio
+import gzip
 import json
+import mimetypes
 import os
 import sys
 import base64
+import binascii
 import io
 import subprocess
 import platform
+import shutil
+import struct
+import tempfile
+import uuid
+import time
+from collections import deque
+from dataclasses import dataclass
 import threading
 import webbrowser
 from datetime import datetime
 from pathlib import Path
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
 from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 
 # Windows 下设置输出编码为 UTF-8
 if sys.platform == 'win32':
@@ -31,18 +42,68 @@ if sys.platform == 'win32':
 
 from PIL import Image
 
+try:
+    # pybase64 基于 libbase64，运行时自动选择 AVX2/AVX-512 等 SIMD 内核，
+    # 对多 MB 图片的编解码比标准库快数倍
+    import pybase64
+except ImportError:
+    pybase64 = None
+
+try:
+    # uvloop 对 WebSocket 密集型负载有 2~4 倍的事件循环提速（Windows 无此包）
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+
+try:
+    # orjson 以 Rust SIMD 实现解析/序列化，对 base64 大载荷快数倍
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    def json_loads(data):
+        return orjson.loads(data)
+
+    def json_dumps(obj):
+        """序列化为 utf-8 bytes（二进制帧直接可发）"""
+        return orjson.dumps(obj)
+else:
+    def json_loads(data):
+        return json.loads(data)
+
+    def json_dumps(obj):
+        """序列化为 utf-8 bytes（二进制帧直接可发）"""
+        return json.dumps(obj).encode('utf-8')
+
 try:
     from loguru import logger
 except ImportError:
     print("请安装 loguru: pip install loguru")
     sys.exit(1)
 
-try:
-    from openpyxl import Workbook, load_workbook
-except ImportError:
-    print("请安装 openpyxl: pip install openpyxl")
-    Workbook = None
-    load_workbook = None
+# openpyxl 体量大且只有 Excel 导入/导出用到：首次使用时再加载，缩短冷启动
+Workbook = None
+load_workbook = None
+_OPENPYXL_MISSING = False
+
+
+def _load_openpyxl():
+    """惰性加载 openpyxl，返回是否可用"""
+    global Workbook, load_workbook, _OPENPYXL_MISSING
+    if Workbook is not None:
+        return True
+    if _OPENPYXL_MISSING:
+        return False
+    try:
+        from openpyxl import Workbook as _Workbook, load_workbook as _load_workbook
+    except ImportError:
+        print("请安装 openpyxl: pip install openpyxl")
+        _OPENPYXL_MISSING = True
+        return False
+    Workbook, load_workbook = _Workbook, _load_workbook
+    return True
 
 try:
     from websockets.server import serve
@@ -82,9 +143,9 @@ logger.remove()  # 移除默认handler
 LOG_FORMAT_CONSOLE = "<green>{time:HH:mm:ss}</green> | <cyan>v{extra[ver]}</cyan> | <level>{message}</level>"
 LOG_FORMAT_FILE = "{time:YYYY-MM-DD HH:mm:ss} | v{extra[ver]} | {name}:{line} | {level: <8} | {message}"
 
-# 控制台输出
+# 控制台输出（直接给 sink 传文件对象，走 loguru 快速路径）
 logger.add(
-    lambda msg: print(msg, end=""),
+    sys.stdout,
     format=LOG_FORMAT_CONSOLE,
     level="INFO",
     colorize=True,
@@ -98,16 +159,113 @@ logger.add(
     format=LOG_FORMAT_FILE,
     rotation="10 MB",
     retention="7 days",
-    encoding="utf-8"
+    encoding="utf-8",
+    enqueue=True  # 文件写入移到专用线程，不在事件循环里内联执行
 )
 
-# 绑定版本号到所有日志
+# 绑定版本号到所有日志；file_only 版本也提前绑定好，避免每次报错都新建 bound logger
 logger = logger.bind(ver=APP_VERSION)
+_FILE_ONLY_LOGGER = logger.bind(file_only=True)
+
+
+# 图片压缩线程池：PIL 的 JPEG 编解码在 C 层释放 GIL，多线程可按核数扩展
+IMAGE_POOL = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+# 外部程序启动线程池：浏览器/文件管理器冷启动可达百毫秒级，不挡 JS 桥接线程
+_LAUNCH_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="launch")
+
+# 宿主系统进程生命周期内不变，查询一次即可
+_SYSTEM = platform.system()
+
+
+def _show_error(title, message):
+    """原生错误弹窗：启动失败路径不再为一次提示引入整个 tkinter"""
+    try:
+        if _SYSTEM == 'Windows':
+            import ctypes
+            ctypes.windll.user32.MessageBoxW(0, message, title, 0x10)  # MB_ICONERROR
+        elif _SYSTEM == 'Darwin':
+            safe = message.replace('"', '\\"').replace('\n', '\\n')
+            script = f'display dialog "{safe}" with title "{title}" with icon stop buttons {{"好"}}'
+            subprocess.run(['osascript', '-e', script])
+        else:
+            subprocess.run(['zenity', '--error', '--title', title, '--text', message])
+    except Exception:
+        print(f"{title}: {message}", file=sys.stderr)
+
+
+def _open_path(path_str):
+    """用系统默认程序打开文件/目录；Popen 即发即走，不等子进程落地"""
+    if _SYSTEM == 'Windows':
+        os.startfile(path_str)
+    elif _SYSTEM == 'Darwin':
+        subprocess.Popen(['open', path_str], start_new_session=True)
+    else:
+        subprocess.Popen(['xdg-open', path_str], start_new_session=True)
+
+# 文件名非法字符映射表（Windows 保留字符集）：
+# str.translate 单次 C 级扫描即可完成替换，比正则更快
+_FILENAME_TRANS = str.maketrans({c: '_' for c in '<>:"/\\|?*'})
+
+# Excel 导入用的校验/映射表：提到模块级，避免每次导入都重建
+_VALID_RESOLUTIONS = {
+    "Create Image": frozenset({"4K", "2K", "1K"}),
+    "Text to Video": frozenset({"1080p", "720p"}),
+    "Frames to Video": frozenset({"1080p", "720p"}),
+    "Ingredients to Video": frozenset({"1080p", "720p"}),
+}
+_TASK_TYPE_MAP = {
+    "文生图片": "Create Image",
+    "文生视频": "Text to Video",
+    "图生视频": "Ingredients to Video",
+    "首尾帧视频": "Frames to Video",
+}
+_ORIENTATION_MAP = {
+    "横屏": "16:9",
+    "竖屏": "9:16"
+}
+_RESOLUTION_CANONICAL = {
+    "4k": "4K",
+    "2k": "2K",
+    "1k": "1K",
+    "1080p": "1080p",
+    "720p": "720p",
+}
+_MAX_REFERENCE_IMAGES = {
+    "Create Image": 8,
+    "Frames to Video": 2,
+    "Ingredients to Video": 3,
+    "Text to Video": 0
+}
+
+
+def _cell_str(value):
+    """把 Excel 单元格值规整成去空白字符串；字符串直接 strip，省掉 str() 往返"""
+    if isinstance(value, str):
+        return value.strip()
+    if value is None:
+        return ""
+    return str(value).strip()
+
+
+def validate_resolution(task_type, resolution, aspect_ratio):
+    """检查分辨率是否与任务类型兼容"""
+    allowed = _VALID_RESOLUTIONS.get(task_type)
+    if allowed is None:
+        return False, f"未知任务类型: {task_type}"
+
+    # 视频类任务竖屏时不支持1080p
+    if "Video" in task_type and aspect_ratio == "9:16" and resolution == "1080p":
+        return False, f"{task_type} 竖屏模式不支持 1080p，请使用 720p"
+
+    if resolution not in allowed:
+        return False, f"{task_type} 不支持分辨率 {resolution}，请使用: {', '.join(sorted(allowed))}"
+    return True, ""
 
 
 def get_logger():
     """获取绑定了版本号的 logger"""
-    return logger.bind(ver=APP_VERSION)
+    return logger
 
 
 def log_error_to_file(message: str, exception: Exception = None):
@@ -116,29 +274,56 @@ def log_error_to_file(message: str, exception: Exception = None):
         # 控制台用ascii转义，避免编码问题
         logger.error(f"{message}: {ascii(str(exception))}")
         # 文件记录完整堆栈
-        logger.bind(file_only=True).exception(f"{message}")
+        _FILE_ONLY_LOGGER.exception(f"{message}")
     else:
         logger.error(message)
 
 
+@dataclass(slots=True)
+class PendingTask:
+    """Excel 导入的待入队任务：比逐行建 dict 更省内存的中间载体"""
+    prompt: str
+    task_type: str
+    aspect_ratio: str
+    resolution: str
+    reference_images: list
+    output_dir: str | None
+    import_row_number: str | None
+
+
 class TaskManager:
     """任务管理器"""
 
     TASK_TIMEOUT_SECONDS = 600  # 任务超时时间：10分钟
     CLIENT_COOLDOWN_SECONDS = 3  # 客户端冷却时间：3秒
 
-    def __init__(self):
+    def __init__(self, loop=None):
+        self.loop = loop  # 事件循环引用，供 JS 桥接线程安全地唤醒派发循环
         self.tasks = []
-        self.current_index = 0
+        self.tasks_by_id = {}  # id -> task，O(1) 查找；self.tasks 仍负责保序
+        self.waiting = deque()  # 等待中任务的 id 队列，调度 O(1)；重置的任务回插队首
         self.is_running = False
         self.clients = {}
+        self.clients_by_url = {}  # page_url -> client_id，同页面重连 O(1) 顶替旧连接
+        self.idle_queue = deque()  # 空闲客户端 FIFO，按进入空闲的先后出队
+        self.client_idle_event = asyncio.Event()  # 有客户端进入空闲时唤醒派发循环
         self.next_page_number = 1
 
+    def wake_dispatcher(self):
+        """置位空闲事件；asyncio.Event 不可跨线程 set，非循环线程走 call_soon_threadsafe"""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if self.loop is not None and running is not self.loop:
+            self.loop.call_soon_threadsafe(self.client_idle_event.set)
+        else:
+            self.client_idle_event.set()
+
     def register_client(self, websocket, page_url):
-        import time
-        for cid, info in list(self.clients.items()):
-            if info['url'] == page_url:
-                del self.clients[cid]
+        old_cid = self.clients_by_url.pop(page_url, None)
+        if old_cid:
+            self.clients.pop(old_cid, None)
 
         client_id = f"c{len(self.clients)}_{int(time.time()) % 10000}"
         page_number = self.next_page_number
@@ -149,8 +334,12 @@ class TaskManager:
             'busy': False,
             'task_id': None,
             'page_number': page_number,
-            'last_task_end': None
+            'ready_at': 0.0,  # monotonic 时间戳，冷却结束后才可再领任务
+            'out_queue': asyncio.Queue(maxsize=32)  # 每客户端独立发送队列
         }
+        self.clients_by_url[page_url] = client_id
+        self.idle_queue.append(client_id)
+        self.client_idle_event.set()
         logger.info(f"客户端注册: {client_id} (页面{page_number})")
         return client_id, page_number
 
@@ -159,40 +348,61 @@ class TaskManager:
             page_number = self.clients[client_id].get('page_number')
             task_id = self.clients[client_id]['task_id']
             if task_id:
-                for task in self.tasks:
-                    if task['id'] == task_id and task['status'] == '处理中':
-                        task['status'] = '等待中'
-                        logger.warning(f"任务 {task_id} 因客户端断开重置为等待")
+                task = self.tasks_by_id.get(task_id)
+                if task and task['status'] == '处理中':
+                    task['status'] = '等待中'
+                    self.waiting.appendleft(task_id)  # 回插队首，保持原有顺序
+                    logger.warning(f"任务 {task_id} 因客户端断开重置为等待")
+            url = self.clients[client_id].get('url')
+            if self.clients_by_url.get(url) == client_id:
+                del self.clients_by_url[url]
             del self.clients[client_id]
             logger.info(f"客户端断开: {client_id} (页面{page_number})")
 
     def get_idle_client(self):
-        now = datetime.now()
-        for cid, info in self.clients.items():
-            if not info['busy']:
-                # 检查冷却时间
-                last_end = info.get('last_task_end')
-                if last_end:
-                    elapsed = (now - datetime.fromisoformat(last_end)).total_seconds()
-                    if elapsed < self.CLIENT_COOLDOWN_SECONDS:
-                        continue  # 还在冷却中，跳过这个客户端
+        """从空闲队列取一个已过冷却期的客户端
+
+        返回 (client_id, info)；全部都在冷却时返回 (None, 最短剩余冷却秒数)，
+        队列为空则返回 (None, None)
+        """
+        now = time.monotonic()
+        min_wait = None
+        rotated = 0
+        # 冷却中的队首转到队尾而不是直接放弃：新注册的客户端 ready_at=0
+        # 排在后面，不能被前面还在冷却的条目挡住（队头阻塞）
+        while self.idle_queue and rotated < len(self.idle_queue):
+            cid = self.idle_queue[0]
+            info = self.clients.get(cid)
+            if info is None or info['busy']:
+                # 已断开或已被占用的陈旧条目，丢弃
+                self.idle_queue.popleft()
+                continue
+            if info['ready_at'] <= now:
+                self.idle_queue.popleft()
                 return cid, info
-        return None, None
+            wait = info['ready_at'] - now
+            if min_wait is None or wait < min_wait:
+                min_wait = wait
+            self.idle_queue.rotate(-1)
+            rotated += 1
+        return None, min_wait
 
     def mark_client_busy(self, client_id, task_id):
         if client_id in self.clients:
             self.clients[client_id]['busy'] = True
             self.clients[client_id]['task_id'] = task_id
-            for task in self.tasks:
-                if task['id'] == task_id:
-                    task['client_id'] = client_id
-                    break
+            task = self.tasks_by_id.get(task_id)
+            if task:
+                task['client_id'] = client_id
 
     def mark_client_idle(self, client_id):
         if client_id in self.clients:
             self.clients[client_id]['busy'] = False
             self.clients[client_id]['task_id'] = None
-            self.clients[client_id]['last_task_end'] = datetime.now().isoformat()
+            self.clients[client_id]['ready_at'] = time.monotonic() + self.CLIENT_COOLDOWN_SECONDS
+            if client_id not in self.idle_queue:
+                self.idle_queue.append(client_id)
+            self.client_idle_event.set()
 
     def get_client_count(self):
         total = len(self.clients)
@@ -200,22 +410,24 @@ class TaskManager:
         return total, busy
 
     def update_task_status_detail(self, task_id, status_detail):
-        for task in self.tasks:
-            if task['id'] == task_id:
-                task['status_detail'] = status_detail
-                return True
+        task = self.tasks_by_id.get(task_id)
+        if task and task.get('status_detail') != status_detail:
+            task['status_detail'] = status_detail
+            return True
         return False
 
-    def add_task(self, prompt, task_type, aspect_ratio, resolution,
-                 reference_images=None, output_dir=None, import_row_number=None):
-        prompt = prompt.strip()
-        if not prompt:
-            return None
+    @staticmethod
+    def _build_task(task_id, prompt, task_type, aspect_ratio, resolution,
+                    reference_images=None, output_dir=None, import_row_number=None):
+        """构造任务字典（含常驻前端视图），不触碰任务列表"""
+        # 小词表字段 intern 后跨任务共享同一对象，后续比较/查表走指针比对
+        task_type = sys.intern(task_type)
+        aspect_ratio = sys.intern(aspect_ratio)
+        resolution = sys.intern(resolution)
 
         if task_type == "Text to Video":
             reference_images = []
 
-        task_id = f"task_{len(self.tasks)}_{datetime.now().strftime('%H%M%S%f')}"
         file_ext = ".mp4" if "Video" in task_type else ".png"
 
         task = {
@@ -230,122 +442,248 @@ class TaskManager:
             'aspect_ratio': aspect_ratio,
             'resolution': resolution,
             'reference_images': reference_images or [],
-            'start_time': None,
+            'start_time': None,       # ISO 字符串，仅供前端展示
+            'start_monotonic': None,  # monotonic 时间戳，超时判断用
             'end_time': None,
             'import_row_number': import_row_number  # 导入任务的行号（编号）
         }
+        # 常驻的前端视图字典：get_status 轮询时就地刷新，不再每次重建
+        task['view'] = {
+            'id': task_id,
+            'prompt': prompt,
+            'status': task['status'],
+            'status_detail': '',
+            'task_type': task_type,
+            'aspect_ratio': aspect_ratio,
+            'resolution': resolution,
+            'saved_path': '',
+            'output_dir': output_dir or '',
+            'start_time': None,
+            'end_time': None,
+            'file_ext': file_ext
+        }
+        return task
+
+    def add_task(self, prompt, task_type, aspect_ratio, resolution,
+                 reference_images=None, output_dir=None, import_row_number=None):
+        prompt = prompt.strip()
+        if not prompt:
+            return None
+
+        task_id = f"task_{len(self.tasks)}_{datetime.now().strftime('%H%M%S%f')}"
+        task = self._build_task(task_id, prompt, task_type, aspect_ratio, resolution,
+                                reference_images, output_dir, import_row_number)
         self.tasks.append(task)
+        self.tasks_by_id[task_id] = task
+        self.waiting.append(task_id)
+        self.wake_dispatcher()  # 唤醒派发循环，新任务无需等下一轮超时
         logger.info(f"添加任务: {task_id} | {task_type} | {aspect_ratio}")
         return task
 
+    def add_tasks(self, task_datas):
+        """批量添加任务（PendingTask 列表）：基序号/时间戳只算一次，一次 extend 入列表"""
+        base = len(self.tasks)
+        stamp = datetime.now().strftime('%H%M%S%f')
+        new_tasks = [
+            self._build_task(
+                f"task_{base + i}_{stamp}",
+                data.prompt,
+                data.task_type,
+                data.aspect_ratio,
+                data.resolution,
+                reference_images=data.reference_images,
+                output_dir=data.output_dir,
+                import_row_number=data.import_row_number
+            )
+            for i, data in enumerate(task_datas)
+            if data.prompt.strip()
+        ]
+        self.tasks.extend(new_tasks)
+        for task in new_tasks:
+            self.tasks_by_id[task['id']] = task
+            self.waiting.append(task['id'])
+        if new_tasks:
+            self.wake_dispatcher()
+        logger.info(f"批量添加 {len(new_tasks)} 个任务")
+        return new_tasks
+
     def get_next_task(self):
-        while self.current_index < len(self.tasks):
-            task = self.tasks[self.current_index]
+        # 队首已不处于等待态的任务（已派发/已跳过）惰性出队
+        while self.waiting:
+            task = self.tasks_by_id[self.waiting[0]]
             if task['status'] == '等待中':
                 return task
-            self.current_index += 1
+            self.waiting.popleft()
         return None
 
     def check_timeout_tasks(self):
         """检查并处理超时任务，返回超时的任务列表"""
         timeout_tasks = []
-        now = datetime.now()
+        now = time.monotonic()
         for task in self.tasks:
-            if task['status'] == '处理中' and task.get('start_time'):
-                start = datetime.fromisoformat(task['start_time'])
-                elapsed = (now - start).total_seconds()
+            if task['status'] == '处理中' and task.get('start_monotonic'):
+                elapsed = now - task['start_monotonic']
                 if elapsed > self.TASK_TIMEOUT_SECONDS:
                     task['status'] = '超时'
-                    task['end_time'] = now.isoformat()
+                    task['end_time'] = datetime.now().isoformat()
                     task['status_detail'] = f'任务超时（超过{self.TASK_TIMEOUT_SECONDS // 60}分钟）'
                     logger.warning(f"任务超时: {task['id']} (耗时 {elapsed:.0f}s)")
-                    # 释放对应客户端
+                    # 释放对应客户端（重新进入空闲队列并计入冷却）
                     client_id = task.get('client_id')
                     if client_id and client_id in self.clients:
-                        self.clients[client_id]['busy'] = False
-                        self.clients[client_id]['task_id'] = None
+                        self.mark_client_idle(client_id)
                     timeout_tasks.append(task)
         return timeout_tasks
 
 
+def encode_buffer_to_base64(buffer):
+    """BytesIO 编码为 base64 字符串，优先走 pybase64 的 SIMD 路径（零拷贝读取缓冲区）"""
+    if pybase64 is not None:
+        return pybase64.b64encode_as_string(buffer.getbuffer())
+    return base64.b64encode(buffer.getvalue()).decode('utf-8')
+
+
+def decode_base64(base64_data):
+    """base64 字符串解码为 bytes，优先走 pybase64 的 SIMD 路径
+
+    输入须是格式良好的 base64（分块路径按 4 字符对齐切片），
+    因此回退路径直接用 binascii.a2b_base64，跳过 b64decode 的校验包装
+    """
+    if pybase64 is not None:
+        return pybase64.b64decode(base64_data, validate=False)
+    return binascii.a2b_base64(base64_data)
+
+
 class ImageProcessor:
+    # 参考图预缩放上限：超过该边长的原图先降采样再进质量搜索，
+    # 省掉对 2400 万像素原图的反复全尺寸 DCT 编码
+    MAX_REFERENCE_EDGE = 2048
+
     @staticmethod
-    def compress_image_to_base64(image_path, max_size_bytes=128 * 1024):
-        try:
-            img = Image.open(image_path)
-            if img.mode in ('RGBA', 'LA', 'P'):
+    def _open_as_rgb(image_path, draft_size):
+        """解码为 RGB 图像；JPEG 输入让 libjpeg 在 DCT 域按 1/2、1/4、1/8
+        直接解到 draft_size 附近（PNG/WEBP 的 draft 是 no-op）"""
+        img = Image.open(image_path)
+        img.draft('RGB', draft_size)
+        if img.mode in ('RGBA', 'LA', 'P'):
+            if img.mode == 'P':
+                img = img.convert('RGBA')
+            if img.mode == 'RGBA' and img.getchannel('A').getextrema()[0] == 255:
+                # 完全不透明时直接转 RGB，省掉整图白底分配和合成遍历
+                img = img.convert('RGB')
+            else:
                 background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
+                background.paste(img, mask=img.split()[-1])
                 img = background
-            elif img.mode != 'RGB':
-                img = img.convert('RGB')
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+        return img
 
-            quality = 95
-            while quality > 5:
+    @staticmethod
+    def compress_image_to_base64(image_path, max_size_bytes=128 * 1024):
+        try:
+            img = ImageProcessor._open_as_rgb(
+                image_path,
+                (ImageProcessor.MAX_REFERENCE_EDGE, ImageProcessor.MAX_REFERENCE_EDGE))
+
+            # 大图先一次性缩到长边 2048 以内，一次 LANCZOS 远比多次全尺寸编码便宜
+            max_edge = ImageProcessor.MAX_REFERENCE_EDGE
+            if max(img.size) > max_edge:
+                img.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+            # 二分查找满足大小限制的最高质量（≤7 次编码，旧的线性扫描最多 19 次）
+            # 探测阶段跳过 optimize（省一次 Huffman 遍历），用 4:2:0 色度抽样；
+            # 参考图用途上限 85 足够，视觉上与 95 无差别
+            lo, hi = 5, 85
+            best_quality = None
+            while lo <= hi:
+                quality = (lo + hi) // 2
+                buffer = io.BytesIO()
+                img.save(buffer, format='JPEG', quality=quality, subsampling=2)
+                if buffer.tell() <= max_size_bytes:
+                    best_quality = quality
+                    lo = quality + 1
+                else:
+                    hi = quality - 1
+
+            if best_quality is not None:
+                # 最终编码才开启 optimize，额外的 Huffman 优化只做一次
                 buffer = io.BytesIO()
-                img.save(buffer, format='JPEG', quality=quality, optimize=True)
-                size = buffer.tell()
-                if size <= max_size_bytes:
-                    buffer.seek(0)
-                    return base64.b64encode(buffer.getvalue()).decode('utf-8')
-                quality -= 5
-
-            scale = 0.9
-            while scale > 0.1:
+                img.save(buffer, format='JPEG', quality=best_quality, optimize=True, subsampling=2)
+                return encode_buffer_to_base64(buffer)
+
+            # 质量压到 5 仍超限，二分搜索缩放比例（文件大小随尺寸近似单调）
+            lo_scale, hi_scale = 0.1, 0.9
+            best_buffer = None
+            for _ in range(5):
+                scale = (lo_scale + hi_scale) / 2
                 new_size = (int(img.size[0] * scale), int(img.size[1] * scale))
-                resized_img = img.resize(new_size, Image.Resampling.LANCZOS)
+                resized_img = img.resize(new_size, Image.Resampling.BILINEAR)
                 buffer = io.BytesIO()
-                resized_img.save(buffer, format='JPEG', quality=85, optimize=True)
-                size = buffer.tell()
-                if size <= max_size_bytes:
-                    buffer.seek(0)
-                    return base64.b64encode(buffer.getvalue()).decode('utf-8')
-                scale -= 0.1
-
-            buffer.seek(0)
-            return base64.b64encode(buffer.getvalue()).decode('utf-8')
+                resized_img.save(buffer, format='JPEG', quality=85, optimize=True, subsampling=2)
+                if buffer.tell() <= max_size_bytes:
+                    best_buffer = buffer
+                    lo_scale = scale
+                else:
+                    hi_scale = scale
+
+            return encode_buffer_to_base64(best_buffer if best_buffer is not None else buffer)
         except Exception as e:
             log_error_to_file("压缩图片失败", e)
             return None
 
+    @staticmethod
+    async def compress_image_to_base64_async(image_path, max_size_bytes=128 * 1024):
+        """compress_image_to_base64 的异步包装：压缩在线程池执行，不阻塞事件循环"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            IMAGE_POOL, ImageProcessor.compress_image_to_base64, image_path, max_size_bytes)
+
     @staticmethod
     def generate_thumbnail(image_path, size=(200, 200)):
         """生成缩略图，返回 base64"""
         try:
-            img = Image.open(image_path)
-            # 转换为 RGB（处理 RGBA 等）
-            if img.mode in ('RGBA', 'LA', 'P'):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-                img = background
-            elif img.mode != 'RGB':
-                img = img.convert('RGB')
+            # 缩略图只有 200px，draft 解到目标 2 倍附近留出重采样余量即可
+            img = ImageProcessor._open_as_rgb(image_path, (size[0] * 2, size[1] * 2))
 
-            # 生成缩略图
-            img.thumbnail(size, Image.Resampling.LANCZOS)
+            # 200px 小图用 BILINEAR 足够，比 LANCZOS 便宜得多
+            img.thumbnail(size, Image.Resampling.BILINEAR)
             buffer = io.BytesIO()
             img.save(buffer, format='JPEG', quality=85, optimize=True)
-            buffer.seek(0)
-            return base64.b64encode(buffer.read()).decode('utf-8')
+            return encode_buffer_to_base64(buffer)
         except Exception as e:
             log_error_to_file("生成缩略图失败", e)
             return None
 
+    @staticmethod
+    async def generate_thumbnail_async(image_path, size=(200, 200)):
+        """generate_thumbnail 的异步包装：缩略图生成在线程池执行，不阻塞事件循环"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            IMAGE_POOL, partial(ImageProcessor.generate_thumbnail, image_path, size))
+
 
 class ImageDownloader:
+    # 流式解码的分片长度：base64 每 4 字符解出 3 字节，必须是 4 的倍数
+    DECODE_CHUNK_CHARS = 256 * 1024
+
+    @staticmethod
+    def _write_base64_to_file(base64_data, filepath):
+        """分片解码、边解边写，避免一次性物化整个解码后的 bytes（峰值内存减半）"""
+        chunk_chars = ImageDownloader.DECODE_CHUNK_CHARS
+        with open(filepath, 'wb') as f:
+            for i in range(0, len(base64_data), chunk_chars):
+                f.write(decode_base64(base64_data[i:i + chunk_chars]))
+
     @staticmethod
     async def save_base64_image(base64_data, filename, output_dir=None):
         if output_dir is None:
             output_dir = OUTPUT_DIR
         filepath = Path(output_dir) / filename
         try:
-            image_data = base64.b64decode(base64_data)
-            with open(filepath, 'wb') as f:
-                f.write(image_data)
+            # 解码和写盘整体放进线程，多 MB 文件 IO 不再阻塞事件循环
+            await asyncio.to_thread(
+                ImageDownloader._write_base64_to_file, base64_data, filepath)
             # 返回绝对路径
             return filepath.absolute()
         except Exception as e:
@@ -353,6 +691,47 @@ class ImageDownloader:
             return None
 
 
+class _GuideRequestHandler(SimpleHTTPRequestHandler):
+    """从内存缓存响应引导页静态资源，命中路径无磁盘 I/O"""
+
+    # url 路径 -> (content_type, 原始字节, gzip 字节)，GuideServer.start 时预填充
+    cache = {}
+
+    def _send_head(self):
+        """查缓存并发送响应头，返回响应体字节；未命中时发 404 并返回 None"""
+        path = self.path.split('?', 1)[0]
+        if path.endswith('/'):
+            path += 'index.html'
+        entry = self.cache.get(path)
+        if entry is None:
+            self.send_error(404, "File not found")
+            return None
+
+        content_type, raw, gzipped = entry
+        use_gzip = 'gzip' in self.headers.get('Accept-Encoding', '')
+        body = gzipped if use_gzip else raw
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        return body
+
+    def do_GET(self):
+        body = self._send_head()
+        if body is not None:
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        # HEAD 同样只查内存缓存，不落到父类的工作目录文件服务
+        self._send_head()
+
+    def log_message(self, format, *args):
+        # 静态小站不逐请求刷日志
+        pass
+
+
 class GuideServer:
     """引导页面 HTTP 服务器"""
 
@@ -373,8 +752,17 @@ class GuideServer:
             return False
 
         try:
-            handler = partial(SimpleHTTPRequestHandler, directory=str(guide_dir))
-            self.server = HTTPServer(('localhost', self.port), handler)
+            # 引导页资源很小，启动时一次性读入内存并预压缩
+            cache = {}
+            for file in guide_dir.rglob('*'):
+                if not file.is_file():
+                    continue
+                raw = file.read_bytes()
+                content_type = mimetypes.guess_type(file.name)[0] or 'application/octet-stream'
+                url_path = '/' + file.relative_to(guide_dir).as_posix()
+                cache[url_path] = (content_type, raw, gzip.compress(raw))
+            _GuideRequestHandler.cache = cache
+            self.server = ThreadingHTTPServer(('localhost', self.port), _GuideRequestHandler)
             self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
             self.thread.start()
             logger.info(f"引导页面服务已启动: http://localhost:{self.port}")
@@ -391,10 +779,24 @@ class GuideServer:
 
 
 class WebSocketServer:
+    # 二进制分块帧头：task_id（32 字节，NUL 填充）+ chunk_index + total_chunks
+    BINARY_HEADER = struct.Struct('<32sII')
+
+    # 超过该时长仍未完成的分块上传视为陈旧，直接丢弃
+    STALE_CHUNK_SECONDS = 2 * TaskManager.TASK_TIMEOUT_SECONDS
+
+    # 单次上传允许的最大分块数（1MB/块 ≈ 1GB 上限），防止恶意 total_chunks 撑爆资源
+    MAX_CHUNKS = 1024
+
+    # 陈旧条目后台清理周期
+    EVICT_SWEEP_SECONDS = 60
+
     def __init__(self, task_manager):
         self.task_manager = task_manager
         self.server = None
-        self.chunk_buffer = {}
+        self.evict_task = None
+        # task_id -> 流式接收状态：临时文件 + base64 余数（不足 4 字符的尾巴）
+        self.chunk_files = {}
 
     def log(self, message):
         logger.info(message)
@@ -402,9 +804,10 @@ class WebSocketServer:
     async def handler(self, websocket):
         client_id = None
         page_number = None
+        sender_task = None
         try:
             first_msg = await websocket.recv()
-            data = json.loads(first_msg)
+            data = json_loads(first_msg)
 
             if data.get('type') != 'register':
                 self.log(f"[警告] 首条消息不是注册消息，断开连接")
@@ -415,13 +818,21 @@ class WebSocketServer:
             total, busy = self.task_manager.get_client_count()
             self.log(f"[OK] 客户端注册: {client_id} (页面#{page_number})，当前连接数: {total}")
 
-            await websocket.send(json.dumps({
+            await websocket.send(json_dumps({
                 'type': 'register_success',
                 'client_id': client_id
             }))
 
+            # 专属发送协程：慢客户端只拖慢自己的队列，不阻塞其他派发
+            sender_task = asyncio.create_task(self._sender_loop(client_id))
+
             async for message in websocket:
-                data = json.loads(message)
+                if isinstance(message, (bytes, bytearray)):
+                    # 原始图片字节走二进制帧，省掉 base64 的 33% 带宽和解码开销
+                    await self.handle_binary_chunk(client_id, page_number, message)
+                    continue
+
+                data = json_loads(message)
                 msg_type = data.get("type")
 
                 if msg_type == "image_chunk":
@@ -430,20 +841,41 @@ class WebSocketServer:
                     total_chunks = data.get("total_chunks")
                     chunk_data = data.get("data")
 
-                    if task_id not in self.chunk_buffer:
-                        self.chunk_buffer[task_id] = {}
-
-                    self.chunk_buffer[task_id][chunk_index] = chunk_data
-                    self.log(f"[收到] [#{page_number}] 收到分块 {chunk_index + 1}/{total_chunks}")
+                    if not total_chunks or total_chunks > self.MAX_CHUNKS:
+                        self.log(f"[警告] [#{page_number}] 非法分块数 {total_chunks}，忽略")
+                        continue
 
-                    if len(self.chunk_buffer[task_id]) == total_chunks:
-                        full_base64 = ''.join(
-                            self.chunk_buffer[task_id][i]
-                            for i in range(total_chunks)
-                        )
-                        del self.chunk_buffer[task_id]
-                        self.log(f"[OK] [#{page_number}] 分块合并完成，总大小: {len(full_base64) // 1024} KB")
-                        await self.handle_image_result(client_id, task_id, full_base64)
+                    # 分块按序到达（WebSocket 保证单连接内消息有序），
+                    # 边到边解码写入临时文件，峰值内存只有一个分块而非整张图
+                    if task_id not in self.chunk_files:
+                        self.evict_chunk_entries()
+                        tmp = tempfile.NamedTemporaryFile(
+                            delete=False, dir=OUTPUT_DIR, suffix='.part')
+                        self.chunk_files[task_id] = {
+                            'file': tmp, 'carry': '', 'received': 0, 'written': 0,
+                            'client_id': client_id, 'created_at': time.monotonic()}
+
+                    entry = self.chunk_files[task_id]
+                    data = entry['carry'] + chunk_data
+                    # base64 以 4 字符为一组解码，余数留到下一分块
+                    usable = len(data) - len(data) % 4
+                    decoded = decode_base64(data[:usable])
+                    entry['file'].write(decoded)
+                    entry['carry'] = data[usable:]
+                    entry['received'] += 1
+                    entry['written'] += len(decoded)
+                    # 分块多时抽样记录进度，避免每块一条日志拖慢接收
+                    if total_chunks < 8 or chunk_index % max(1, total_chunks // 8) == 0 \
+                            or chunk_index == total_chunks - 1:
+                        self.log(f"[收到] [#{page_number}] 收到分块 {chunk_index + 1}/{total_chunks}")
+
+                    if entry['received'] == total_chunks:
+                        if entry['carry']:
+                            entry['file'].write(decode_base64(entry['carry']))
+                        entry['file'].close()
+                        del self.chunk_files[task_id]
+                        self.log(f"[OK] [#{page_number}] 分块接收完成，总大小: {entry['written'] // 1024} KB")
+                        await self.handle_image_result(client_id, task_id, temp_path=entry['file'].name)
 
                 elif msg_type == "image_data":
                     task_id = data.get("task_id")
@@ -456,81 +888,179 @@ class WebSocketServer:
                     error = data.get("error")
                     if error:
                         self.log(f"[失败] [#{page_number}] 任务失败: {error}")
-                        for task in self.task_manager.tasks:
-                            if task['id'] == task_id:
-                                task['status'] = '失败'
-                                task['status_detail'] = error
-                                task['end_time'] = datetime.now().isoformat()
-                                break
+                        task = self.task_manager.tasks_by_id.get(task_id)
+                        if task:
+                            task['status'] = '失败'
+                            task['status_detail'] = error
+                            task['end_time'] = datetime.now().isoformat()
                     self.task_manager.mark_client_idle(client_id)
 
                 elif msg_type == "status":
                     status_msg = data.get('message', '')
-                    self.log(f"[状态] [#{page_number}] {status_msg}")
                     task_id = self.task_manager.clients.get(client_id, {}).get('task_id')
+                    # 相同状态连续上报时只更新、不重复记日志
                     if task_id:
-                        self.task_manager.update_task_status_detail(task_id, status_msg)
+                        if self.task_manager.update_task_status_detail(task_id, status_msg):
+                            self.log(f"[状态] [#{page_number}] {status_msg}")
+                    else:
+                        self.log(f"[状态] [#{page_number}] {status_msg}")
 
         except Exception as e:
             self.log("连接异常")
             log_error_to_file("WebSocket连接异常", e)
         finally:
             if client_id:
+                if sender_task is not None:
+                    sender_task.cancel()
+                # 清理该客户端未完成的分块上传，避免临时文件/句柄泄漏
+                self.evict_chunk_entries(client_id)
                 self.task_manager.remove_client(client_id)
                 total, busy = self.task_manager.get_client_count()
                 self.log(f"[断开] 客户端断开: {client_id} (页面#{page_number})，当前连接数: {total}")
 
-    async def handle_image_result(self, client_id, task_id, base64_data):
-        for task in self.task_manager.tasks:
-            if task['id'] == task_id:
-                output_dir = task.get('output_dir')
-                if output_dir:
-                    if not Path(output_dir).is_absolute():
-                        output_dir = OUTPUT_DIR / output_dir
-                    else:
-                        output_dir = Path(output_dir)
-                else:
-                    output_dir = OUTPUT_DIR
-                output_dir.mkdir(parents=True, exist_ok=True)
+    async def _sender_loop(self, client_id):
+        """从客户端发送队列串行取 (task, message) 发出；失败时回滚任务"""
+        info = self.task_manager.clients.get(client_id)
+        if not info:
+            return
+        queue = info['out_queue']
+        while True:
+            task, message = await queue.get()
+            try:
+                await info['ws'].send(message)
+            except Exception as e:
+                logger.error(f"任务发送失败: {task['id']} -> {client_id}")
+                log_error_to_file("任务发送失败", e)
+                task['status'] = '等待中'
+                self.task_manager.waiting.appendleft(task['id'])
+                self.task_manager.mark_client_idle(client_id)
 
-                file_ext = task.get('file_ext', '.png')
+    def _discard_chunk_entry(self, task_id):
+        entry = self.chunk_files.pop(task_id, None)
+        if entry:
+            try:
+                entry['file'].close()
+                os.unlink(entry['file'].name)
+            except OSError:
+                pass
+
+    def evict_chunk_entries(self, client_id=None):
+        """丢弃指定客户端的未完成上传；顺带清理超时的陈旧条目"""
+        now = time.monotonic()
+        for task_id in list(self.chunk_files):
+            entry = self.chunk_files[task_id]
+            if ((client_id is not None and entry['client_id'] == client_id)
+                    or now - entry['created_at'] > self.STALE_CHUNK_SECONDS):
+                self._discard_chunk_entry(task_id)
+                logger.warning(f"丢弃未完成的分块上传: {task_id}")
+
+    async def handle_binary_chunk(self, client_id, page_number, message):
+        task_id_raw, chunk_index, total_chunks = self.BINARY_HEADER.unpack_from(message)
+        task_id = task_id_raw.rstrip(b'\x00').decode('utf-8')
+        body = memoryview(message)[self.BINARY_HEADER.size:]
+
+        if not total_chunks or total_chunks > self.MAX_CHUNKS:
+            self.log(f"[警告] [#{page_number}] 非法分块数 {total_chunks}，忽略")
+            return
 
-                # 如果是导入任务，使用行号作为文件名（不论是否设置输出文件夹）
-                if task.get('import_row_number'):
-                    filename = f"{task['import_row_number']}{file_ext}"
-                    filepath = output_dir / filename
+        if task_id not in self.chunk_files:
+            self.evict_chunk_entries()
+            tmp = tempfile.NamedTemporaryFile(
+                delete=False, dir=OUTPUT_DIR, suffix='.part')
+            self.chunk_files[task_id] = {
+                'file': tmp, 'carry': '', 'received': 0, 'written': 0,
+                'client_id': client_id, 'created_at': time.monotonic()}
+
+        entry = self.chunk_files[task_id]
+        entry['file'].write(body)
+        entry['received'] += 1
+        entry['written'] += len(body)
+        # 分块多时抽样记录进度，避免每块一条日志拖慢接收
+        if total_chunks < 8 or chunk_index % max(1, total_chunks // 8) == 0 \
+                or chunk_index == total_chunks - 1:
+            self.log(f"[收到] [#{page_number}] 收到分块 {chunk_index + 1}/{total_chunks}")
+
+        if entry['received'] == total_chunks:
+            entry['file'].close()
+            del self.chunk_files[task_id]
+            self.log(f"[OK] [#{page_number}] 分块接收完成，总大小: {entry['written'] // 1024} KB")
+            await self.handle_image_result(client_id, task_id, temp_path=entry['file'].name)
+
+    async def handle_image_result(self, client_id, task_id, base64_data=None, temp_path=None):
+        task = self.task_manager.tasks_by_id.get(task_id)
+        if task:
+            output_dir = task.get('output_dir')
+            if output_dir:
+                if not Path(output_dir).is_absolute():
+                    output_dir = OUTPUT_DIR / output_dir
                 else:
-                    # 普通任务使用时间戳
-                    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-                    filename = f"{timestamp}{file_ext}"
-                    filepath = output_dir / filename
-
-                    # 避免重名
-                    counter = 1
-                    while filepath.exists():
-                        filename = f"{timestamp}_{counter}{file_ext}"
-                        filepath = output_dir / filename
-                        counter += 1
-
-                # 保存文件
+                    output_dir = Path(output_dir)
+            else:
+                output_dir = OUTPUT_DIR
+            output_dir.mkdir(parents=True, exist_ok=True)
+
+            file_ext = task.get('file_ext', '.png')
+
+            # 如果是导入任务，使用行号作为文件名（不论是否设置输出文件夹）
+            if task.get('import_row_number'):
+                filename = f"{task['import_row_number']}{file_ext}"
+                filepath = output_dir / filename
+            else:
+                # 普通任务使用时间戳；O_EXCL 原子抢占文件名，
+                # 避免 exists() 轮询的逐次 syscall 和并发保存时的竞态
+                timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+                filename = None
+                for attempt in range(4):
+                    suffix = '' if attempt == 0 else f'_{uuid.uuid4().hex[:6]}'
+                    candidate = f"{timestamp}{suffix}{file_ext}"
+                    try:
+                        fd = os.open(output_dir / candidate,
+                                     os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+                        os.close(fd)
+                        filename = candidate
+                        break
+                    except FileExistsError:
+                        continue
+                if filename is None:
+                    filename = f"{timestamp}_{uuid.uuid4().hex}{file_ext}"
+                filepath = output_dir / filename
+
+            # 保存文件：分块路径直接把临时文件挪到目标位置（同盘时为原子 rename）
+            if temp_path is not None:
+                try:
+                    shutil.move(temp_path, filepath)
+                    saved = filepath.absolute()
+                except Exception as e:
+                    log_error_to_file("保存图片失败", e)
+                    saved = None
+            else:
                 saved = await ImageDownloader.save_base64_image(base64_data, filename, output_dir)
-                if saved:
-                    task['status'] = '已完成'
-                    task['end_time'] = datetime.now().isoformat()
-                    task['saved_path'] = str(saved)
-                    task['output_dir_path'] = str(output_dir)
-                    # 生成并缓存缩略图（只对图片生成）
-                    if task.get('file_ext') in ('.png', '.jpg'):
-                        try:
-                            task['preview_base64'] = ImageProcessor.generate_thumbnail(str(saved), size=(200, 200))
-                        except Exception:
-                            task['preview_base64'] = ''
-                    logger.info(f"任务完成: {task_id} -> {saved}")
-                else:
-                    task['status'] = '下载失败'
-                    task['end_time'] = datetime.now().isoformat()
-                    logger.error(f"任务保存失败: {task_id}")
-                break
+            if saved:
+                # 先生成并缓存缩略图（只对图片生成），再置完成态：
+                # get_status 在桥接线程轮询，若先置状态，前端可能在窗口期
+                # 取到空缩略图并永久缓存
+                if task.get('file_ext') in ('.png', '.jpg'):
+                    try:
+                        task['preview_base64'] = await ImageProcessor.generate_thumbnail_async(str(saved), size=(200, 200))
+                    except Exception:
+                        task['preview_base64'] = ''
+                task['status'] = '已完成'
+                task['end_time'] = datetime.now().isoformat()
+                task['saved_path'] = str(saved)
+                task['output_dir_path'] = str(output_dir)
+                logger.info(f"任务完成: {task_id} -> {saved}")
+            else:
+                task['status'] = '下载失败'
+                task['end_time'] = datetime.now().isoformat()
+                logger.error(f"任务保存失败: {task_id}")
+        elif temp_path is not None:
+            # 未知任务（如重启后旧页面补发的结果）：条目已出 chunk_files，
+            # 临时文件必须就地清掉，否则 .part 残留在输出目录
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            logger.warning(f"丢弃未知任务的结果: {task_id}")
         self.task_manager.mark_client_idle(client_id)
 
     async def start(self):
@@ -539,8 +1069,12 @@ class WebSocketServer:
                 self.handler,
                 "localhost",
                 12343,
-                max_size=50 * 1024 * 1024
+                max_size=50 * 1024 * 1024,
+                # base64 载荷熵高，per-message deflate 几乎无收益还烧 CPU
+                compression=None
             )
+            # 定期扫掉陈旧的分块上传，不依赖下一次上传触发
+            self.evict_task = asyncio.create_task(self._evict_loop())
             logger.info("WebSocket 服务器已启动: ws://localhost:12345")
         except OSError as e:
             # 端口被占用
@@ -548,7 +1082,14 @@ class WebSocketServer:
             log_error_to_file("WebSocket服务器启动失败", e)
             raise
 
+    async def _evict_loop(self):
+        while True:
+            await asyncio.sleep(self.EVICT_SWEEP_SECONDS)
+            self.evict_chunk_entries()
+
     async def stop(self):
+        if self.evict_task:
+            self.evict_task.cancel()
         if self.server:
             self.server.close()
             await self.server.wait_closed()
@@ -579,21 +1120,14 @@ class Api:
         total, busy = self.task_manager.get_client_count()
         tasks_data = []
         for t in self.task_manager.tasks:
-            tasks_data.append({
-                'id': t['id'],
-                'prompt': t['prompt'],
-                'status': t['status'],
-                'status_detail': t.get('status_detail', ''),
-                'task_type': t['task_type'],
-                'aspect_ratio': t['aspect_ratio'],
-                'resolution': t['resolution'],
-                'saved_path': t.get('saved_path', ''),
-                'output_dir': t.get('output_dir', ''),
-                'start_time': t.get('start_time'),
-                'end_time': t.get('end_time'),
-                'file_ext': t.get('file_ext', ''),
-                'preview_base64': t.get('preview_base64', '')
-            })
+            # 只就地刷新可变字段，静态字段在 add_task 时已写入 view
+            view = t['view']
+            view['status'] = t['status']
+            view['status_detail'] = t.get('status_detail', '')
+            view['saved_path'] = t.get('saved_path', '')
+            view['start_time'] = t.get('start_time')
+            view['end_time'] = t.get('end_time')
+            tasks_data.append(view)
         return {
             'client_count': total,
             'busy_count': busy,
@@ -601,6 +1135,13 @@ class Api:
             'tasks': tasks_data
         }
 
+    def get_thumbnail(self, task_id):
+        """按需获取任务缩略图，轮询响应不再内嵌 base64 数据"""
+        task = self.task_manager.tasks_by_id.get(task_id)
+        if not task:
+            return ''
+        return task.get('preview_base64', '')
+
     def start_execution(self):
         total, _ = self.task_manager.get_client_count()
         if total == 0:
@@ -632,64 +1173,122 @@ class Api:
                 if not has_busy:
                     logger.info("所有任务已完成")
                     break
-                await asyncio.sleep(1)
+                # 等忙碌客户端完成（mark_client_idle 会置位事件），
+                # 上限 1s 保证超时检查仍按秒级周期运行
+                self.task_manager.client_idle_event.clear()
+                try:
+                    await asyncio.wait_for(
+                        self.task_manager.client_idle_event.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    pass
                 continue
 
             client_id, client_info = self.task_manager.get_idle_client()
-            if not client_info:
-                await asyncio.sleep(1)
+            if not client_id:
+                # 等待客户端空闲事件唤醒；上限 1s（或队首剩余冷却时间），
+                # 保证超时检查仍按秒级周期运行
+                delay = client_info if client_info is not None else 1.0
+                self.task_manager.client_idle_event.clear()
+                try:
+                    await asyncio.wait_for(
+                        self.task_manager.client_idle_event.wait(),
+                        timeout=min(delay, 1.0))
+                except asyncio.TimeoutError:
+                    pass
                 continue
 
-            # 检查导入任务的文件是否已存在，如果存在直接跳过
-            if task.get('import_row_number'):
-                output_dir = task.get('output_dir')
-                if output_dir:
-                    if not Path(output_dir).is_absolute():
-                        output_dir = OUTPUT_DIR / output_dir
-                    else:
-                        output_dir = Path(output_dir)
-                else:
-                    output_dir = OUTPUT_DIR
+            # 本轮把所有可立即派发的 (task, client) 配好对，随后并发发送：
+            # 多客户端时派发延迟为 max(send) 而非 N 次 send 之和
+            dispatches = []
+            while task and client_id:
+                # 检查导入任务的文件是否已存在，如果存在直接跳过
+                if task.get('import_row_number') and await self._skip_if_exists(task):
+                    task = self.task_manager.get_next_task()
+                    continue
 
-                file_ext = task.get('file_ext', '.png')
-                filepath = output_dir / f"{task['import_row_number']}{file_ext}"
+                task['status'] = '处理中'
+                task['start_time'] = datetime.now().isoformat()
+                task['start_monotonic'] = time.monotonic()
+                self.task_manager.mark_client_busy(client_id, task['id'])
 
-                if filepath.exists():
-                    task['status'] = '已完成'
-                    task['end_time'] = datetime.now().isoformat()
-                    task['saved_path'] = str(filepath.absolute())
-                    task['output_dir_path'] = str(output_dir)
-                    task['status_detail'] = '文件已存在，跳过生成'
-                    # 生成缩略图
-                    if file_ext in ('.png', '.jpg'):
-                        try:
-                            task['preview_base64'] = ImageProcessor.generate_thumbnail(str(filepath), size=(200, 200))
-                        except Exception:
-                            task['preview_base64'] = ''
-                    logger.info(f"[跳过] 文件已存在: {filepath}")
-                    self.task_manager.current_index += 1
-                    continue
+                logger.info(f"分配任务: {task['id']} -> {client_id} | {task['task_type']}")
+                dispatches.append((task, client_id, client_info))
 
-            task['status'] = '处理中'
-            task['start_time'] = datetime.now().isoformat()
-            self.task_manager.mark_client_busy(client_id, task['id'])
-            self.task_manager.current_index += 1
+                task = self.task_manager.get_next_task()
+                if not task:
+                    break
+                client_id, client_info = self.task_manager.get_idle_client()
 
-            logger.info(f"分配任务: {task['id']} -> {client_id} | {task['task_type']}")
+            # 已出队但本轮没派上任务的客户端放回队首，否则它会永远掉出空闲队列
+            if client_id and isinstance(client_info, dict) and not client_info['busy']:
+                self.task_manager.idle_queue.appendleft(client_id)
 
-            # 延迟处理参考图片：如果是路径则压缩为 base64
-            reference_images = []
-            for img in task['reference_images']:
-                if img and not img.startswith('/9j/') and not img.startswith('iVBOR') and Path(img).exists():
-                    # 是文件路径，需要压缩
-                    base64_data = ImageProcessor.compress_image_to_base64(img)
-                    if base64_data:
-                        reference_images.append(base64_data)
-                else:
-                    # 已经是 base64 数据
-                    reference_images.append(img)
+            if dispatches:
+                await asyncio.gather(*[
+                    self._dispatch_task(t, cid, info)
+                    for t, cid, info in dispatches
+                ], return_exceptions=True)
+
+        self.task_manager.is_running = False
+        logger.info("任务队列执行结束")
 
-            message = json.dumps({
+    async def _skip_if_exists(self, task):
+        """导入任务的输出文件已存在时直接标记完成，返回是否跳过"""
+        output_dir = task.get('output_dir')
+        if output_dir:
+            if not Path(output_dir).is_absolute():
+                output_dir = OUTPUT_DIR / output_dir
+            else:
+                output_dir = Path(output_dir)
+        else:
+            output_dir = OUTPUT_DIR
+
+        file_ext = task.get('file_ext', '.png')
+        filepath = output_dir / f"{task['import_row_number']}{file_ext}"
+
+        if not filepath.exists():
+            return False
+
+        # 同 handle_image_result：缩略图先于完成态写入，避免轮询窗口期；
+        # 生成放线程池，批量导入大量命中跳过时不卡派发循环
+        if file_ext in ('.png', '.jpg'):
+            try:
+                task['preview_base64'] = await ImageProcessor.generate_thumbnail_async(str(filepath), size=(200, 200))
+            except Exception:
+                task['preview_base64'] = ''
+        task['status'] = '已完成'
+        task['end_time'] = datetime.now().isoformat()
+        task['saved_path'] = str(filepath.absolute())
+        task['output_dir_path'] = str(output_dir)
+        task['status_detail'] = '文件已存在，跳过生成'
+        logger.info(f"[跳过] 文件已存在: {filepath}")
+        return True
+
+    async def _dispatch_task(self, task, client_id, client_info):
+        """压缩参考图并把任务发给指定客户端；失败时回滚任务状态"""
+        # 重派发（如客户端断开后重回等待）直接复用已序列化的消息，
+        # 免去多 MB 参考图的重复压缩和 JSON 序列化
+        message = task.get('_wire')
+        if message is None:
+            # 延迟处理参考图片：如果是路径则压缩为 base64（多张图并行压缩）
+            ref_inputs = task['reference_images']
+            path_indices = [
+                i for i, img in enumerate(ref_inputs)
+                if img and not img.startswith('/9j/') and not img.startswith('iVBOR') and Path(img).exists()
+            ]
+            reference_images = list(ref_inputs)
+            if path_indices:
+                compressed = await asyncio.gather(*[
+                    ImageProcessor.compress_image_to_base64_async(ref_inputs[i])
+                    for i in path_indices
+                ])
+                for i, base64_data in zip(path_indices, compressed):
+                    reference_images[i] = base64_data
+                # 压缩失败的图片直接丢弃
+                reference_images = [img for img in reference_images if img]
+
+            # 预编码为 bytes 发送，websockets 不再做一次 str→utf-8 拷贝
+            message = json_dumps({
                 'type': 'task',
                 'task_id': task['id'],
                 'prompt': task['prompt'],
@@ -698,19 +1297,17 @@ class Api:
                 'resolution': task['resolution'],
                 'reference_images': reference_images
             })
+            task['_wire'] = message
 
-            try:
-                await client_info['ws'].send(message)
-            except Exception as e:
-                logger.error(f"任务发送失败: {task['id']} -> {client_id}")
-                log_error_to_file(f"任务发送失败", e)
-                task['status'] = '等待中'
-                self.task_manager.mark_client_idle(client_id)
-
-            await asyncio.sleep(0.5)
-
-        self.task_manager.is_running = False
-        logger.info("任务队列执行结束")
+        try:
+            # 入客户端专属队列，由 WebSocketServer._sender_loop 串行发出
+            client_info['out_queue'].put_nowait((task, message))
+        except asyncio.QueueFull:
+            # 队列满视为客户端不可用，任务回队等待重新派发
+            logger.error(f"任务入队失败（队列满）: {task['id']} -> {client_id}")
+            task['status'] = '等待中'
+            self.task_manager.waiting.appendleft(task['id'])
+            self.task_manager.mark_client_idle(client_id)
 
     def select_images(self):
         """打开文件对话框选择图片"""
@@ -723,19 +1320,20 @@ class Api:
         if not result:
             return []
 
+        logger.info(f"正在处理 {len(result)} 张图片...")
         images = []
-        for filepath in result:
-            logger.info(f"正在处理: {Path(filepath).name}")
-            base64_data = ImageProcessor.compress_image_to_base64(filepath)
+        # 多张图并行压缩（JPEG 编码是释放 GIL 的 C 代码）
+        for filepath, base64_data in zip(result, IMAGE_POOL.map(
+                ImageProcessor.compress_image_to_base64, result)):
             if base64_data:
                 images.append(base64_data)
                 size_kb = len(base64_data) * 3 / 4 / 1024
                 logger.info(f"已添加: {Path(filepath).name} (压缩后 ~{size_kb:.1f}KB)")
         return images
 
-    def import_excel(self):
-        """导入 Excel 文件"""
-        if load_workbook is None:
+    def import_excel(self, fail_fast=False):
+        """导入 Excel 文件；fail_fast=True 时遇到首个校验错误立即返回"""
+        if not _load_openpyxl():
             return {'success': False, 'count': 0, 'errors': ['请安装 openpyxl']}
 
         file_types = ('Excel文件 (*.xlsx)',)
@@ -749,122 +1347,100 @@ class Api:
         filepath = result[0]
         logger.info(f"导入 Excel 开始: {Path(filepath).name}")
 
-        # 验证分辨率和任务类型是否匹配
-        def validate_resolution(task_type, resolution, aspect_ratio):
-            """检查分辨率是否与任务类型兼容"""
-            valid_resolutions = {
-                "Create Image": ["4K", "2K", "1K"],
-                "Text to Video": ["1080p", "720p"],
-                "Frames to Video": ["1080p", "720p"],
-                "Ingredients to Video": ["1080p", "720p"]
-            }
-            if task_type not in valid_resolutions:
-                return False, f"未知任务类型: {task_type}"
-
-            allowed = valid_resolutions[task_type]
-
-            # 视频类任务竖屏时不支持1080p
-            if "Video" in task_type and aspect_ratio == "9:16" and resolution == "1080p":
-                return False, f"{task_type} 竖屏模式不支持 1080p，请使用 720p"
-
-            if resolution not in allowed:
-                return False, f"{task_type} 不支持分辨率 {resolution}，请使用: {', '.join(allowed)}"
-            return True, ""
-
-        task_type_map = {
-            "文生图片": "Create Image",
-            "文生视频": "Text to Video",
-            "图生视频": "Ingredients to Video",
-            "首尾帧视频": "Frames to Video",
-        }
-        orientation_map = {
-            "横屏": "16:9",
-            "竖屏": "9:16"
-        }
-
+        wb = None
         try:
-            wb = load_workbook(filepath)
+            # 只读流式加载：大表不用整本载入内存
+            wb = load_workbook(filepath, read_only=True, data_only=True, keep_links=False)
             ws = wb.active
 
             # 第一步：验证所有行
             tasks_to_add = []
             validation_errors = []
+            # 热循环内省掉属性查找
+            tasks_to_add_append = tasks_to_add.append
+            errors_append = validation_errors.append
+            # 参考图存在性检查去重：多行引用同一素材时只 stat 一次
+            exists_cache = {}
+            # 输出目录去重：N 行 K 个不同目录只留 K 个字符串对象
+            dir_cache = {}
 
             for row_idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
                 if not row or not row[1]:
                     continue
 
                 try:
-                    # 读取编号列（第一列）
-                    row_number = str(row[0]).strip() if row[0] else str(row_idx)
+                    # 读取编号列（第一列）；编号会直接用作输出文件名，先清理非法字符
+                    row_number = _cell_str(row[0]) if row[0] else str(row_idx)
+                    row_number = row_number.translate(_FILENAME_TRANS)
 
-                    prompt = str(row[1]).strip() if row[1] else ""
+                    prompt = _cell_str(row[1])
                     if not prompt:
                         continue
 
-                    task_type_cn = str(row[2]).strip() if len(row) > 2 and row[2] else "图片"
-                    orientation_cn = str(row[3]).strip() if len(row) > 3 and row[3] else "横屏"
-                    resolution = str(row[4]).strip() if len(row) > 4 and row[4] else ""
-                    output_dir = str(row[5]).strip() if len(row) > 5 and row[5] else None
+                    task_type_cn = _cell_str(row[2]) if len(row) > 2 and row[2] else "图片"
+                    orientation_cn = _cell_str(row[3]) if len(row) > 3 and row[3] else "横屏"
+                    resolution = _cell_str(row[4]) if len(row) > 4 and row[4] else ""
+                    output_dir = _cell_str(row[5]) if len(row) > 5 and row[5] else None
+                    if output_dir:
+                        output_dir = dir_cache.setdefault(output_dir, sys.intern(output_dir))
 
                     # 验证任务类型
-                    if task_type_cn not in task_type_map:
-                        validation_errors.append(f"编号{row_number}: 未知任务类型: {task_type_cn}，请使用: {', '.join(task_type_map.keys())}")
+                    if task_type_cn not in _TASK_TYPE_MAP:
+                        errors_append(f"编号{row_number}: 未知任务类型: {task_type_cn}，请使用: {', '.join(_TASK_TYPE_MAP.keys())}")
+                        if fail_fast:
+                            break
                         continue
 
-                    task_type = task_type_map[task_type_cn]
-                    aspect_ratio = orientation_map.get(orientation_cn, "16:9")
+                    task_type = _TASK_TYPE_MAP[task_type_cn]
+                    aspect_ratio = _ORIENTATION_MAP.get(orientation_cn, "16:9")
 
                     if not resolution:
                         resolution = "1080p" if "Video" in task_type else "4K"
                     else:
-                        # 分辨率忽略大小写处理
-                        resolution_upper = resolution.upper()
-                        resolution_lower = resolution.lower()
-                        # 标准化为正确的格式（如 4k -> 4K, 1080p -> 1080p）
-                        if resolution_upper in ["4K", "2K", "1K"]:
-                            resolution = resolution_upper
-                        elif resolution_lower == "1080p":
-                            resolution = "1080p"
-                        elif resolution_lower == "720p":
-                            resolution = "720p"
+                        # 忽略大小写标准化（如 4k -> 4K），一次查表替代分支链
+                        resolution = _RESOLUTION_CANONICAL.get(resolution.lower(), resolution)
 
                     # 验证分辨率
                     is_valid, error_msg = validate_resolution(task_type, resolution, aspect_ratio)
                     if not is_valid:
-                        validation_errors.append(f"行{row_idx}: {error_msg}")
+                        errors_append(f"行{row_idx}: {error_msg}")
+                        if fail_fast:
+                            break
                         continue
 
-                    reference_images = []
-                    max_images = {
-                        "Create Image": 8,
-                        "Frames to Video": 2,
-                        "Ingredients to Video": 3,
-                        "Text to Video": 0
-                    }.get(task_type, 8)
+                    max_images = _MAX_REFERENCE_IMAGES.get(task_type, 8)
+                    # 文生视频不带参考图：共享空元组，跳过整段图片列处理
+                    reference_images = [] if max_images else ()
 
                     # 只收集图片路径，不在导入时压缩（延迟到执行时处理）
                     for i in range(max_images):
                         col_idx = 6 + i
                         if len(row) > col_idx and row[col_idx]:
-                            img_path = str(row[col_idx]).strip()
-                            if img_path and Path(img_path).exists():
+                            img_path = _cell_str(row[col_idx])
+                            if not img_path:
+                                continue
+                            hit = exists_cache.get(img_path)
+                            if hit is None:
+                                # lexists 省去 Path 构造，一次 stat 出结果
+                                hit = os.path.lexists(img_path)
+                                exists_cache[img_path] = hit
+                            if hit:
                                 reference_images.append(img_path)
 
-                    tasks_to_add.append({
-                        'prompt': prompt,
-                        'task_type': task_type,
-                        'aspect_ratio': aspect_ratio,
-                        'resolution': resolution,
-                        'reference_images': reference_images,
-                        'output_dir': output_dir,
-                        'import_row_number': row_number  # Excel 编号列的值
-                    })
+                    tasks_to_add_append(PendingTask(
+                        prompt=prompt,
+                        task_type=task_type,
+                        aspect_ratio=aspect_ratio,
+                        resolution=resolution,
+                        reference_images=reference_images,
+                        output_dir=output_dir,
+                        import_row_number=row_number  # Excel 编号列的值
+                    ))
 
                 except Exception as e:
-                    validation_errors.append(f"编号{row_number}: {str(e)}")
-
-            wb.close()
+                    errors_append(f"编号{row_number}: {str(e)}")
+                    if fail_fast:
+                        break
 
             # 如果有验证错误，全部不导入
             if validation_errors:
@@ -874,17 +1450,8 @@ class Api:
             if not tasks_to_add:
                 return {'success': False, 'count': 0, 'errors': ['没有找到有效的任务行']}
 
-            # 第二步：全部验证通过，一次性导入所有任务
-            for task_data in tasks_to_add:
-                self.task_manager.add_task(
-                    prompt=task_data['prompt'],
-                    task_type=task_data['task_type'],
-                    aspect_ratio=task_data['aspect_ratio'],
-                    resolution=task_data['resolution'],
-                    reference_images=task_data['reference_images'],
-                    output_dir=task_data['output_dir'],
-                    import_row_number=task_data['import_row_number']
-                )
+            # 第二步：全部验证通过，一次性批量导入所有任务
+            self.task_manager.add_tasks(tasks_to_add)
 
             count = len(tasks_to_add)
             logger.info(f"从Excel导入 {count} 个任务")
@@ -892,10 +1459,41 @@ class Api:
 
         except Exception as e:
             return {'success': False, 'count': 0, 'errors': [str(e)]}
+        finally:
+            # 只读模式持有 zip 句柄，异常路径也要释放
+            if wb is not None:
+                wb.close()
+
+    # 模板内容固定：首次导出时构建一次，之后直接写缓存字节
+    _template_bytes = None
+
+    @staticmethod
+    def _build_template_bytes():
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "任务列表"
+
+        ws.append(["编号", "提示词", "任务类型", "屏幕方向", "分辨率", "输出文件夹",
+                   "图1", "图2", "图3", "图4", "图5", "图6", "图7", "图8"])
+
+        examples = [
+            [1, "A beautiful sunset over the ocean", "文生图片", "横屏", "4K", "sunset"],
+            [2, "A beautiful moon over the ocean", "文生图片", "竖屏", "2K", "sunset"],
+            [3, "A cute cat playing", "文生视频", "横屏", "1080p", "cats"],
+            [4, "A cute dog playing", "文生视频", "竖屏", "720p", "dogs_注意veo3竖屏视频不支持1080p"],
+            [5, "动起来", "首尾帧视频", "横屏", "1080p", "frames", "/Users/wei/Downloads/pig.jpeg"],
+            [6, "组合这些照片为一个创意视频", "图生视频", "横屏", "1080p", "collage", "/Users/wei/Downloads/pig.jpeg"],
+        ]
+        for example in examples:
+            ws.append(example)
+
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        return buffer.getvalue()
 
     def export_template(self):
         """导出 Excel 模板"""
-        if Workbook is None:
+        if not _load_openpyxl():
             return
 
         file_types = ('Excel文件 (*.xlsx)',)
@@ -914,29 +1512,9 @@ class Api:
             filepath += '.xlsx'
 
         try:
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "任务列表"
-
-            headers = ["编号", "提示词", "任务类型", "屏幕方向", "分辨率", "输出文件夹",
-                       "图1", "图2", "图3", "图4", "图5", "图6", "图7", "图8"]
-            for col, header in enumerate(headers, start=1):
-                ws.cell(row=1, column=col, value=header)
-
-            examples = [
-                [1, "A beautiful sunset over the ocean", "文生图片", "横屏", "4K", "sunset"],
-                [2, "A beautiful moon over the ocean", "文生图片", "竖屏", "2K", "sunset"],
-                [3, "A cute cat playing", "文生视频", "横屏", "1080p", "cats"],
-                [4, "A cute dog playing", "文生视频", "竖屏", "720p", "dogs_注意veo3竖屏视频不支持1080p"],
-                [5, "动起来", "首尾帧视频", "横屏", "1080p", "frames", "/Users/wei/Downloads/pig.jpeg"],
-                [6, "组合这些照片为一个创意视频", "图生视频", "横屏", "1080p", "collage", "/Users/wei/Downloads/pig.jpeg"],
-            ]
-
-            for row_idx, example in enumerate(examples, start=2):
-                for col_idx, value in enumerate(example, start=1):
-                    ws.cell(row=row_idx, column=col_idx, value=value)
-
-            wb.save(filepath)
+            if Api._template_bytes is None:
+                Api._template_bytes = self._build_template_bytes()
+            Path(filepath).write_bytes(Api._template_bytes)
             logger.info(f"已导出模板: {filepath}")
 
         except Exception as e:
@@ -955,18 +1533,9 @@ class Api:
         if 0 <= task_index < len(self.task_manager.tasks):
             task = self.task_manager.tasks[task_index]
             saved_path = task.get('saved_path')
-            if saved_path and Path(saved_path).exists():
-                path = Path(saved_path)
-                # 直接打开文件
-                path_str = str(path.absolute())
-                system = platform.system()
-
-                if system == 'Windows':
-                    os.startfile(path_str)
-                elif system == 'Darwin':
-                    subprocess.run(['open', path_str])
-                else:
-                    subprocess.run(['xdg-open', path_str])
+            if saved_path and os.path.lexists(saved_path):
+                # saved_path 入库时已是绝对路径，一次 stat 后直接打开
+                _open_path(os.path.abspath(saved_path))
             else:
                 # 文件不存在，打开所在目录
                 self.open_task_dir(task_index)
@@ -983,19 +1552,11 @@ class Api:
             self._open_directory(OUTPUT_DIR)
 
     def _open_directory(self, path):
-        path = Path(path)
-        if not path.exists():
-            path.mkdir(parents=True, exist_ok=True)
-
-        path_str = str(path.absolute())
-        system = platform.system()
+        path_str = os.path.abspath(os.fspath(path))
+        if not os.path.isdir(path_str):
+            os.makedirs(path_str, exist_ok=True)
 
-        if system == 'Windows':
-            os.startfile(path_str)
-        elif system == 'Darwin':
-            subprocess.run(['open', path_str])
-        else:
-            subprocess.run(['xdg-open', path_str])
+        _open_path(path_str)
 
     def get_app_version(self) -> str:
         """获取应用版本号"""
@@ -1032,16 +1593,17 @@ class Api:
         }
 
     def open_update_page(self, url: str) -> bool:
-        """在浏览器中打开更新下载页面"""
+        """在浏览器中打开更新下载页面（启动放到线程池，立即归还桥接线程）"""
         logger.info(f"打开下载页面: {url}")
-        return open_download_page(url)
+        _LAUNCH_POOL.submit(open_download_page, url)
+        return True
 
     def open_guide_page(self) -> bool:
         """在外部浏览器中打开引导页面"""
         guide_url = "http://localhost:12346"
         logger.info(f"打开引导页面: {guide_url}")
         try:
-            webbrowser.open(guide_url)
+            _LAUNCH_POOL.submit(webbrowser.open, guide_url)
             return True
         except Exception as e:
             logger.error(f"打开引导页面失败: {e}")
@@ -1058,7 +1620,7 @@ def main():
     logger.info("=" * 50)
     logger.info(f"Veo3Free 启动 - 版本: {get_version()}")
     logger.info(f"运行环境: {'打包模式' if getattr(sys, 'frozen', False) else '开发模式'}")
-    logger.info(f"操作系统: {platform.system()} {platform.release()}")
+    logger.info(f"操作系统: {_SYSTEM} {platform.release()}")
     logger.info(f"Python: {sys.version}")
     logger.info(f"输出目录: {OUTPUT_DIR}")
     logger.info(f"日志目录: {LOGS_DIR}")
@@ -1070,7 +1632,7 @@ def main():
     thread.start()
 
     # 创建任务管理器和 API
-    task_manager = TaskManager()
+    task_manager = TaskManager(loop)
     api = Api(task_manager, loop)
 
     # 启动 WebSocket 服务器，捕获端口占用错误
@@ -1086,23 +1648,12 @@ def main():
         # 端口被占用，弹框提示用户
         logger.error(f"WebSocket 服务器启动失败 (端口占用): {e}")
         error_msg = "无法启动应用!\n\nWebSocket 端口 12345 被占用\n\n请检查是否有其他程序占用该端口，或稍后重试。"
-        import tkinter as tk
-        from tkinter import messagebox
-        root = tk.Tk()
-        root.withdraw()  # 隐藏主窗口
-        messagebox.showerror("启动失败", error_msg)
-        root.destroy()
+        _show_error("启动失败", error_msg)
         return
     except Exception as e:
         # 其他错误
         logger.error(f"WebSocket 服务器启动失败: {e}")
-        error_msg = "无法启动 WebSocket 服务器，请稍后重试。"
-        import tkinter as tk
-        from tkinter import messagebox
-        root = tk.Tk()
-        root.withdraw()
-        messagebox.showerror("启动失败", error_msg)
-        root.destroy()
+        _show_error("启动失败", "无法启动 WebSocket 服务器，请稍后重试。")
         return
 
     # 启动引导页面服务
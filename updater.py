@@ -1,8 +1,9 @@
 """应用更新检查模块"""
 
+import http.client
 import json
 import platform
-import urllib.request
+import time
 import urllib.error
 import webbrowser
 from dataclasses import dataclass
@@ -14,6 +15,9 @@ from version import get_version, compare_versions, GITHUB_REPO, __version__
 # 绑定版本号到日志
 logger = logger.bind(ver=__version__)
 
+# 宿主系统进程生命周期内不变，查询一次即可
+_SYSTEM_LOWER = platform.system().lower()
+
 
 @dataclass
 class UpdateInfo:
@@ -26,11 +30,52 @@ class UpdateInfo:
     release_url: str
 
 
-def check_for_updates() -> Optional[UpdateInfo]:
+# 更新检查结果 TTL 缓存：发布频率远低于用户点击频率，短期内直接复用
+_CACHE = {"ts": 0.0, "info": None}
+_CACHE_TTL_SECONDS = 600
+
+# 复用同一条 TLS 连接，非缓存命中的检查省掉整个握手
+_API_HOST = "api.github.com"
+_API_HEADERS = {
+    "Accept": "application/vnd.github.v3+json",
+    "User-Agent": "veo3free-updater"
+}
+_CONN: Optional[http.client.HTTPSConnection] = None
+
+
+def _github_get_json(path: str) -> dict:
+    """经复用连接请求 GitHub API；连接失效时重建并重试一次"""
+    global _CONN
+    for attempt in (0, 1):
+        try:
+            if _CONN is None:
+                _CONN = http.client.HTTPSConnection(_API_HOST, timeout=10)
+            _CONN.request("GET", path, headers=_API_HEADERS)
+            response = _CONN.getresponse()
+        except (http.client.HTTPException, ConnectionError, OSError):
+            if _CONN is not None:
+                _CONN.close()
+                _CONN = None
+            if attempt:
+                raise
+            continue
+        if response.status != 200:
+            response.read()  # 读空响应体，连接仍可复用
+            raise urllib.error.URLError(f"HTTP {response.status}")
+        return json.load(response)
+    return {}
+
+
+def check_for_updates(force: bool = False) -> Optional[UpdateInfo]:
     """
-    检查是否有新版本
+    检查是否有新版本（10 分钟内重复调用直接返回缓存，force=True 强制刷新）
     返回: UpdateInfo 对象，失败时返回 None
     """
+    now = time.monotonic()
+    if not force and _CACHE["info"] is not None and now - _CACHE["ts"] < _CACHE_TTL_SECONDS:
+        logger.debug("更新检查命中缓存，跳过网络请求")
+        return _CACHE["info"]
+
     current = get_version()
     logger.info(f"开始检查更新，当前版本: {current}")
 
@@ -39,38 +84,28 @@ def check_for_updates() -> Optional[UpdateInfo]:
         return None
 
     try:
-        api_url = f"https://api.github.com/repos/{GITHUB_REPO}/releases/latest"
-        logger.debug(f"请求 API: {api_url}")
-
-        request = urllib.request.Request(
-            api_url,
-            headers={
-                "Accept": "application/vnd.github.v3+json",
-                "User-Agent": "veo3free-updater"
-            }
-        )
-
-        with urllib.request.urlopen(request, timeout=10) as response:
-            data = json.loads(response.read().decode('utf-8'))
+        api_path = f"/repos/{GITHUB_REPO}/releases/latest"
+        logger.debug(f"请求 API: https://{_API_HOST}{api_path}")
+        data = _github_get_json(api_path)
 
         latest_version = data.get("tag_name", "").lstrip('v')
         release_notes = data.get("body", "")
         release_url = data.get("html_url", "")
         logger.info(f"获取到最新版本: {latest_version}")
 
-        system = platform.system().lower()
         download_url = ""
 
-        for asset in data.get("assets", []):
-            name = asset.get("name", "").lower()
-            if system == "darwin" and "macos" in name and name.endswith(".dmg"):
-                download_url = asset.get("browser_download_url", "")
-                logger.debug(f"找到 macOS 下载链接: {name}")
-                break
-            elif system == "windows" and "windows" in name and name.endswith(".zip"):
-                download_url = asset.get("browser_download_url", "")
-                logger.debug(f"找到 Windows 下载链接: {name}")
-                break
+        if _SYSTEM_LOWER in ("darwin", "windows"):
+            token, suffix = ("macos", ".dmg") if _SYSTEM_LOWER == "darwin" else ("windows", ".zip")
+            download_url = next(
+                (asset.get("browser_download_url", "")
+                 for asset in data.get("assets", ())
+                 if token in asset.get("name", "").lower()
+                 and asset.get("name", "").lower().endswith(suffix)),
+                ""
+            )
+            if download_url:
+                logger.debug(f"找到 {_SYSTEM_LOWER} 下载链接: {download_url}")
 
         if not download_url:
             download_url = release_url
@@ -79,7 +114,7 @@ def check_for_updates() -> Optional[UpdateInfo]:
         has_update = compare_versions(current, latest_version) < 0
         logger.info(f"版本比较: {current} vs {latest_version}, 有更新: {has_update}")
 
-        return UpdateInfo(
+        info = UpdateInfo(
             has_update=has_update,
             current_version=current,
             latest_version=latest_version,
@@ -87,6 +122,9 @@ def check_for_updates() -> Optional[UpdateInfo]:
             download_url=download_url,
             release_url=release_url
         )
+        _CACHE["ts"] = now
+        _CACHE["info"] = info
+        return info
 
     except urllib.error.URLError as e:
         logger.error(f"检查更新失败（网络错误）: {type(e).__name__}: {e}")
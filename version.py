@@ -1,5 +1,7 @@
 """版本管理模块"""
 
+import functools
+import re
 import sys
 from pathlib import Path
 
@@ -8,8 +10,9 @@ GITHUB_REPO = "jasper9w/veo3free"
 __version__ = "1.0.9"
 
 
+@functools.lru_cache(maxsize=1)
 def get_version() -> str:
-    """获取当前应用版本号"""
+    """获取当前应用版本号（开发模式只在首次调用时解析 pyproject.toml）"""
     if getattr(sys, 'frozen', False):
         return __version__
 
@@ -20,22 +23,26 @@ def get_version() -> str:
         return tomllib.load(f)["project"]["version"]
 
 
+_VER_RE = re.compile(r'v?(\d+)(?:\.(\d+))?(?:\.(\d+))?')
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_version(v: str) -> tuple:
+    """解析为三元组；正则一次匹配，缺位补0，结果按值缓存"""
+    m = _VER_RE.match(v)
+    if not m:
+        raise ValueError(f"无法解析版本号: {v}")
+    return (int(m[1]), int(m[2] or 0), int(m[3] or 0))
+
+
 def compare_versions(current: str, latest: str) -> int:
     """
     比较两个版本号
     返回: -1 (当前版本较旧), 0 (相同), 1 (当前版本较新)
     """
-    def parse_version(v: str) -> tuple:
-        v = v.lstrip('v')
-        parts = v.split('.')
-        # 补齐至少3位，不足的补0
-        while len(parts) < 3:
-            parts.append('0')
-        return tuple(int(p) for p in parts[:3])
-
     try:
-        current_tuple = parse_version(current)
-        latest_tuple = parse_version(latest)
+        current_tuple = _parse_version(current)
+        latest_tuple = _parse_version(latest)
 
         if current_tuple < latest_tuple:
             return -1
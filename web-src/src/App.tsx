@@ -18,7 +18,6 @@ interface Task {
   start_time?: string;
   end_time?: string;
   file_ext?: string;
-  preview_base64?: string;
 }
 
 interface Status {
@@ -54,9 +53,10 @@ function formatDuration(startTime?: string, endTime?: string): string {
 interface TaskCardProps {
   task: Task;
   index: number;
+  thumbnail?: string;
 }
 
-function TaskCard({ task, index }: TaskCardProps) {
+function TaskCard({ task, index, thumbnail }: TaskCardProps) {
   const [, setTick] = useState(0);
   const statusConfig: Record<string, { icon: React.ComponentType<{ className?: string }>; color: string; bg: string; text: string; label: string; animate?: boolean }> = {
     '已完成': { icon: Check, color: 'emerald', bg: 'bg-emerald-50', text: 'text-emerald-600', label: '已完成' },
@@ -135,9 +135,9 @@ function TaskCard({ task, index }: TaskCardProps) {
         {/* Preview Thumbnail on the right */}
         {hasPreview && (
           <div className="w-20 h-20 rounded-lg overflow-hidden border border-zinc-200 bg-zinc-100 flex-shrink-0 relative">
-            {isImage && task.preview_base64 && (
+            {isImage && thumbnail && (
               <img
-                src={`data:image/png;base64,${task.preview_base64}`}
+                src={`data:image/png;base64,${thumbnail}`}
                 alt="preview"
                 className="w-full h-full object-cover cursor-pointer hover:opacity-80 transition-opacity"
               />
@@ -162,6 +162,7 @@ function App() {
   const [resolution, setResolution] = useState('1K');
   const [refImages, setRefImages] = useState<string[]>([]);
   const [status, setStatus] = useState<Status>({ client_count: 0, busy_count: 0, is_running: false, tasks: [] });
+  const [thumbnails, setThumbnails] = useState<Record<string, string>>({});
   const [systemInfo, setSystemInfo] = useState<SystemInfo | null>(null);
   const [ready, setReady] = useState(false);
   const [showTypeDropdown, setShowTypeDropdown] = useState(false);
@@ -245,6 +246,32 @@ function App() {
     return () => { cancelled = true; };
   }, [ready, api]);
 
+  // 按需拉取缩略图：轮询响应不再内嵌 base64，完成的图片任务单独获取一次
+  useEffect(() => {
+    if (!ready || !api) return;
+    const pending = status.tasks.filter(
+      (t: Task) =>
+        t.status === '已完成' &&
+        (t.file_ext === '.png' || t.file_ext === '.jpg') &&
+        thumbnails[t.id] === undefined
+    );
+    if (!pending.length) return;
+    let cancelled = false;
+    const fetchThumbnails = async () => {
+      for (const task of pending) {
+        try {
+          const data: string = await api.get_thumbnail(task.id);
+          if (cancelled) return;
+          setThumbnails(prev => ({ ...prev, [task.id]: data }));
+        } catch {
+          // 获取失败时不缓存，下次轮询重试
+        }
+      }
+    };
+    fetchThumbnails();
+    return () => { cancelled = true; };
+  }, [ready, api, status.tasks]);
+
   // 任务类型或比例变化时重置分辨率
   useEffect(() => {
     const currentResolutions = taskType === 'Create Image'
@@ -714,6 +741,7 @@ function App() {
                       key={task.id}
                       task={task}
                       index={index}
+                      thumbnail={thumbnails[task.id]}
                     />
                   ))
                 )}
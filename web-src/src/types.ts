@@ -42,6 +42,7 @@ export interface PyWebViewApi {
     output_dir: string
   ) => Promise<{ success: boolean; error?: string }>;
   get_status: () => Promise<Status>;
+  get_thumbnail: (taskId: string) => Promise<string>;
   start_execution: () => Promise<void>;
   stop_execution: () => Promise<void>;
   select_images: () => Promise<string[]>;